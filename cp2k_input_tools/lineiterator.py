@@ -31,25 +31,28 @@ class ContinuationLineIterator(Iterator):
     def __next__(self) -> str:
         """yields LineEntries"""
 
-        self._starts = [0]
-        self._colnrs = []
+        # this runs once per raw line of every (included) file, keep the loop body lean:
+        # bound methods avoid repeated attribute lookups on self
+        starts = self._starts = [0]
+        colnrs = self._colnrs = []
+        append_colnr = colnrs.append
         line = ""
 
         for self._linenr, raw_line in self._fiter:
             lstripped = raw_line.lstrip()  # CP2K consequently strips all left whitespace
-            self._colnrs += [len(raw_line) - len(lstripped)]  # remember where the original colnr started
+            append_colnr(len(raw_line) - len(lstripped))  # remember where the original colnr started
 
             # Python has universal line endings (always only \n)
             line += lstripped.rstrip("\n")
 
             if line.endswith("\\"):
                 line = line[:-1]
-                self._starts += [len(line)]
+                starts.append(len(line))
                 continue
 
             return line
 
-        if self._colnrs:
+        if colnrs:
             raise LineContinuationError("stray line continuation at end of file")
 
         raise StopIteration
@@ -1,7 +1,7 @@
 import re
 import xml.etree.ElementTree as ET
 import itertools
-from typing import List, Union
+from typing import Dict, List, Union
 from dataclasses import dataclass, field
 from collections import Counter
 from fractions import Fraction
@@ -25,6 +25,8 @@ class Section:
     keywords: List[Keyword] = field(default_factory=list)
     param: Union[int, float, str, bool, None] = None
     repeats: bool = False
+    # lazily built name/alias lookup tables for the schema node, one per tag:
+    _name_index: Dict[str, Dict[str, ET.Element]] = field(default_factory=dict, repr=False, compare=False)
 
     def subsections_by_name(self, name):
         yield from (s for s in self.subsections if s.name == name)
@@ -34,22 +36,31 @@ class Section:
 
     @property
     def keyword_names(self):
-        yield from (n.text for n in self.node.iterfind("./KEYWORD/NAME"))
+        # direct child iteration runs in C, while iterfind goes through the interpreted ElementPath
+        yield from (n.text for kw in self.node if kw.tag == "KEYWORD" for n in kw if n.tag == "NAME")
 
     @property
     def section_names(self):
-        yield from (n.text for n in self.node.iterfind("./SECTION/NAME"))
+        yield from (n.text for s in self.node if s.tag == "SECTION" for n in s if n.tag == "NAME")
 
     def find_node_by_name(self, tag, name):
         """return the node matching the given name or None"""
-        for node in self.node.iterfind(f"./{tag}"):
-            # ElementTree does not have a parent relationship,
-            # hence the double loop
-            for sub in node.iterfind("./NAME"):
-                if sub.text == name.upper():
-                    return node
+        try:
+            index = self._name_index[tag]
+        except KeyError:
+            # index all names and aliases once, subsequent lookups are then single dict hits
+            index = {}
+            for node in self.node:
+                if node.tag != tag:
+                    continue
+                # ElementTree does not have a parent relationship,
+                # hence the double loop
+                for sub in node:
+                    if sub.tag == "NAME":
+                        index.setdefault(sub.text, node)
+            self._name_index[tag] = index
 
-        return None
+        return index.get(name.upper())
 
 
 class CP2KInputParser:
@@ -88,8 +99,10 @@ class CP2KInputParser:
 
         if section_name == "END":
             section_param = section_param.rstrip()
+            section_param_upper = section_param.upper()
 
-            if section_param and section_param.upper() not in [e.text for e in self._treerefs[-1].node.iterfind("./NAME")]:
+            # early-exit membership test instead of materializing the full NAME list first
+            if section_param and not any(n.tag == "NAME" and n.text == section_param_upper for n in self._treerefs[-1].node):
                 raise SectionMismatchError("could not match open section with name: {section_param}", Context())
 
             # if the END param was a match or none was specified, go a level up
@@ -201,13 +214,18 @@ class CP2KInputParser:
         self._tree = Section("/", node=self._spec.getroot())
         self._treerefs = [self._tree]
 
+        # bind the per-line methods to locals, LOAD_FAST in the loop is
+        # considerably cheaper than the attribute+method lookups on self
+        parse_as_section = self._parse_as_section
+        parse_as_keyword = self._parse_as_keyword
+
         for line in preprocessor:
             try:
                 if line.startswith("&"):
-                    self._parse_as_section(line)
+                    parse_as_section(line)
                     continue
 
-                self._parse_as_keyword(line)
+                parse_as_keyword(line)
 
             except (TokenizerError, InvalidParameterError, InvalidSectionError, InvalidNameError) as exc:
                 exc.args[1]["filename"] = preprocessor.fname
@@ -301,7 +319,7 @@ class CP2KInputParserSimplified(CP2KInputParser):
                     # if the section is not already there, check whether to add as list or as dict with the param as subkey
                     if section_name not in treeref:
                         param_counts = Counter(s.param for s in currsec.subsections if s.name == section.name)
-                        valid_keys = [n for n in itertools.chain(section.keyword_names, section.section_names)]
+                        valid_keys = set(itertools.chain(section.keyword_names, section.section_names))
                         # check that the parameters are unique, strings and do not match any keywords or sections valid in that section
                         if self._repeated_section_unpack and all(
                             c == 1 and isinstance(p, str) and p.upper() not in valid_keys for p, c in param_counts.items()
@@ -331,9 +349,13 @@ class CP2KInputParserSimplified(CP2KInputParser):
 
                 stack += [section]
 
+            # aggregate values by keyword name first: repeated keywords always collect into a list
+            # which is unwrapped at the end, instead of converting a scalar to a list on the second hit
+            keyword_values = {}
             for keyword in currsec.keywords:
-                keyword_name = self._key_trafo(keyword.name)
+                keyword_values.setdefault(self._key_trafo(keyword.name), []).append(self._get_value(keyword))
 
+            for keyword_name, values in keyword_values.items():
                 # if the keyword already exists as a section:
                 if (keyword_name in treeref) and (
                     isinstance(treeref[keyword_name], dict)
@@ -342,15 +364,8 @@ class CP2KInputParserSimplified(CP2KInputParser):
                     # prefix that sections key with a '+'
                     treeref[f"+{keyword_name}"] = treeref.pop(keyword_name)
 
-                if keyword_name in treeref:
-                    # NOTE: we don't have to check for mistakenly repeated keywords, that was already done while parsing
-                    #       we are therefore not risking to append to a keyword with multiple values
-                    if not isinstance(treeref[keyword_name], list):
-                        # if the value is not yet a list, make it one
-                        treeref[keyword_name] = [self._get_value(keyword)]
-
-                    treeref[keyword_name] += [self._get_value(keyword)]
-                else:
-                    treeref[keyword_name] = self._get_value(keyword)
+                # NOTE: we don't have to check for mistakenly repeated keywords, that was already done while parsing
+                #       we are therefore not risking to merge values of a keyword which may not repeat
+                treeref[keyword_name] = values if len(values) > 1 else values[0]
 
         return tree
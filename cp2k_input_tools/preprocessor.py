@@ -1,5 +1,7 @@
+import os
 import re
-from typing import NamedTuple, Sequence
+import sys
+from typing import Sequence
 from collections.abc import Iterator
 from pathlib import Path
 
@@ -9,124 +11,218 @@ from .tokenizer import Context, TokenizerError, COMMENT_CHARS, tokenize
 from .parser_errors import PreprocessorError
 
 
-class _Variable(NamedTuple):
-    value: str
-    ctx: Context
+class _Variable:
+    # plain slotted class: .value is read on every variable resolution and
+    # namedtuple attribute access goes through an extra descriptor indirection
+    __slots__ = ("value", "ctx")
 
+    def __init__(self, value, ctx):
+        self.value = value
+        self.ctx = ctx
 
-class _ConditionalBlock(NamedTuple):
-    condition: str
-    ctx: Context
+
+class _ConditionalBlock:
+    __slots__ = ("condition", "ctx")
+
+    def __init__(self, condition, ctx):
+        self.condition = condition
+        self.ctx = ctx
 
 
 _VALID_VAR_NAME_MATCH = re.compile(r"^[a-z_]\w*$", flags=re.IGNORECASE | re.ASCII)
-_CONDITIONAL_MATCH = re.compile(r"\s*@(?P<stmt>IF|ENDIF)\s*(?P<cond>.*)", flags=re.IGNORECASE)
-_SET_MATCH = re.compile(r"\s*@SET\s+(?P<var>\S+)\s+(?P<value>.+)", flags=re.IGNORECASE)
-_INCLUDE_MATCH = re.compile(r"\s*(?P<complete>@(?P<type>INCLUDE|XCTYPE)\b\s*(?P<file>.*))", flags=re.IGNORECASE)
 
+# all directives in one alternation: a single match classifies the directive and extracts
+# its arguments, instead of running one pattern per directive until one sticks
+_DIRECTIVE_MATCH = re.compile(
+    r"\s*(?P<complete>@(?:"
+    r"(?P<stmt>ENDIF|IF)(?![a-z])\s*(?P<cond>.*)"
+    r"|SET\s+(?P<var>\S+)\s+(?P<value>.+)"
+    r"|(?P<inctype>INCLUDE|XCTYPE)\b\s*(?P<file>.*)"
+    r"))",
+    flags=re.IGNORECASE,
+)
 
-class CP2KPreprocessor(Iterator):
-    def __init__(self, fhandle, base_dir, initial_variable_values=None):
-        self._varstack = {}
-        self._lineiter = MultiFileLineIterator()
-        self._conditional_block = None
-        self._current_line_entry = None
+# classify a line as comment or preprocessor directive with a single C-level match
+# (anything else, including an empty line, does not match and is regular content)
+_LINE_DISPATCH_MATCH = re.compile(rf"(?P<comment>[{''.join(COMMENT_CHARS)}])|(?P<directive>@)")
 
-        if isinstance(base_dir, (str, Path)):
-            self._inc_dirs = [Path(base_dir)]
-        elif isinstance(base_dir, Sequence):
-            self._inc_dirs = [Path(b) for b in base_dir]
-        else:
-            raise TypeError("invalid type passed for base_dir")
+_RESOLVE_CACHE_MAX_SIZE = 256
 
-        if initial_variable_values:
-            self._varstack.update({k.upper(): _Variable(v, None) for k, v in initial_variable_values.items()})
+# read included files (basis sets, pseudos, coordinates can be large) in 1 MiB chunks
+# instead of the default 8 KiB to cut down on read syscalls and buffer refills
+_INCLUDE_BUFFER_SIZE = 1 << 20
 
-        self._lineiter.add_file(fhandle, managed=False)
 
-    def _resolve_variables(self, line):
-        var_start = 0
-        var_end = 0
+def _substitute_variables(line, varstack):
+    """Substitute all ${...} and $... references in a line, given a dict of uppercased names to _Variable
 
-        ctx = Context(line=line)
+    This is the innermost loop of the preprocessor and is kept free of any state other
+    than its arguments and locals, so it can be compiled as-is (e.g. by Cython) should
+    the package ever grow an optional extension build. Line and column numbers in raised
+    error contexts refer to the line as it looked when the error was detected.
+    """
+
+    # the following algorithm is from CP2Ks cp_parser_inpp_methods.F to reproduce its behavior :(
 
-        # the following algorithm is from CP2Ks cp_parser_inpp_methods.F to reproduce its behavior :(
+    # handle both the "${...}" (no nesting, meaning that ${foo${bar}} means foo$bar is the key)
+    # and the "$..." form in a single left-to-right scan, peeking for a '{' at each '$': fragments
+    # are collected in a list and joined once, instead of splicing the full line per substitution
+    parts = []
+    pos = 0
 
-        # first replace all "${...}"  with no nesting, meaning that ${foo${bar}} means foo$bar is the key
-        while True:
-            var_start = line.find("${")
-            if var_start < 0:
-                break
+    while True:
+        var_start = line.find("$", pos)
+        if var_start < 0:
+            break
 
+        value = None
+        rescan = False
+
+        braced = line[var_start + 1 : var_start + 2] == "{"
+
+        if not braced:
+            var_end = line.find(" ", var_start + 1)
+            if var_end < 0:
+                # no space left: the name runs up to the end of the text, determined by
+                # stepping over trailing whitespace rather than allocating via rstrip()
+                var_end = len(line)
+                while var_end > var_start and line[var_end - 1].isspace():
+                    var_end -= 1
+
+            embedded = line.find("${", var_start + 1)
+            if 0 <= embedded < var_end:
+                # a braced reference inside the span composes the plain-form key ($A${B} means
+                # the key is A<value of B>): resolve it first and rescan, like the separate
+                # first pass of the original two-pass algorithm did
+                var_start = embedded
+                braced = True
+                rescan = True
+
+        # error contexts are only built at the raise sites, the happy path allocates none
+        if braced:
             var_end = line.find("}", var_start + 2)
             if var_end < 0:
-                ctx["colnr"] = len(line)
-                ctx["ref_colnr"] = var_start
-                raise PreprocessorError(f"unterminated variable", ctx)
+                raise PreprocessorError(f"unterminated variable", Context(line=line, colnr=len(line), ref_colnr=var_start))
 
-            ctx["colnr"] = var_start
-            ctx["ref_colnr"] = var_end
+            ref_colnr = var_end
 
             key = line[var_start + 2 : var_end]  # without ${ and }
-            value = None
+            resume = var_end + 1  # skip the closing brace
 
             try:
                 # see whether we got a default value and unpack
                 key, value = key.split("-", maxsplit=1)
             except ValueError:
                 pass
+        else:
+            ref_colnr = var_end - 1
 
-            if not _VALID_VAR_NAME_MATCH.match(key):
-                raise PreprocessorError(f"invalid variable name '{key}'", ctx) from None
+            key = line[var_start + 1 : var_end]
+            resume = var_end  # keep the terminating space
 
-            try:
-                value = self._varstack[key.upper()].value
-            except KeyError:
-                if value is None:
+        if not _VALID_VAR_NAME_MATCH.match(key):
+            raise PreprocessorError(
+                f"invalid variable name '{key}'", Context(line=line, colnr=var_start, ref_colnr=ref_colnr)
+            ) from None
+
+        # str.isupper is a C-level scan and cheaper than unconditionally allocating via upper()
+        # interning matches the interned insert keys, making the dict probe a pointer comparison
+        var_key = sys.intern(key if key.isupper() else key.upper())
+
+        try:
+            value = varstack[var_key].value
+        except KeyError:
+            if value is None:
+                ctx = Context(line=line, colnr=var_start, ref_colnr=ref_colnr)
+
+                if line[var_start + 1 : var_start + 2] == "{":  # only the braced form can carry a default
                     raise PreprocessorError(f"undefined variable '{key}' (and no default given)", ctx) from None
 
-            line = f"{line[:var_start]}{value}{line[var_end+1:]}"
+                raise PreprocessorError(f"undefined variable '{key}'", ctx) from None
 
-        var_start = 0
-        var_end = 0
+        value = f"{value}"
 
-        while True:
-            var_start = line.find("$")
-            if var_start < 0:
-                break
+        if rescan or "$" in value:
+            # a pending plain-form reference before this one, or the substituted value
+            # contains a reference itself: splice and rescan (rare)
+            line = f"{''.join(parts)}{line[pos:var_start]}{value}{line[resume:]}"
+            parts = []
+            pos = 0
+            continue
 
-            var_end = line.find(" ", var_start + 1)
-            if var_end < 0:
-                # -1 would be the last entry, but in a range it is without the specified entry
-                var_end = len(line.rstrip())
+        parts.append(line[pos:var_start])
+        parts.append(value)
+        pos = resume
 
-            ctx["colnr"] = var_start
-            ctx["ref_colnr"] = var_end - 1
+    if parts:
+        parts.append(line[pos:])
+        line = "".join(parts)
 
-            key = line[var_start + 1 : var_end]
+    return line
 
-            if not _VALID_VAR_NAME_MATCH.match(key):
-                raise PreprocessorError(f"invalid variable name '{key}'", ctx) from None
 
-            try:
-                value = self._varstack[key.upper()].value
-            except KeyError:
-                raise PreprocessorError(f"undefined variable '{key}'", ctx) from None
+class CP2KPreprocessor(Iterator):
+    def __init__(self, fhandle, base_dir, initial_variable_values=None):
+        self._varstack = {}
+        self._lineiter = MultiFileLineIterator()
+        self._conditional_block = None
+        self._current_line_entry = None
+
+        # cache of resolved lines, invalidated by bumping the version on every @SET
+        self._resolve_cache = {}
+        self._varstack_version = 0
+
+        # store the include dirs as plain strings: os.path.join on them is a single C call
+        # per @INCLUDE, while pathlib would construct several intermediate objects each time
+        if isinstance(base_dir, (str, Path)):
+            self._inc_dirs = [os.fspath(base_dir)]
+        elif isinstance(base_dir, Sequence):
+            self._inc_dirs = [os.fspath(b) for b in base_dir]
+        else:
+            raise TypeError("invalid type passed for base_dir")
+
+        if initial_variable_values:
+            self._varstack.update({sys.intern(k.upper()): _Variable(v, None) for k, v in initial_variable_values.items()})
+
+        self._lineiter.add_file(fhandle, managed=False)
+
+    def _resolve_variables(self, line):
+        # most lines do not reference any variable at all, get them out of the way first
+        if "$" not in line:
+            return line
 
-            line = f"{line[:var_start]}{value}{line[var_end:]}"
+        cache_key = (line, self._varstack_version)
+        try:
+            return self._resolve_cache[cache_key]
+        except KeyError:
+            pass
+
+        line = _substitute_variables(line, self._varstack)
+
+        if len(self._resolve_cache) >= _RESOLVE_CACHE_MAX_SIZE:
+            # drop the oldest entry, the same policy the re module uses for its pattern cache
+            del self._resolve_cache[next(iter(self._resolve_cache))]
+        self._resolve_cache[cache_key] = line
 
         return line
 
     def _parse_preprocessor_instruction(self, line):
-        conditional_match = _CONDITIONAL_MATCH.match(line)
-
         ctx = Context(line=line)
 
-        if conditional_match:
-            stmt = conditional_match.group("stmt")
-            condition = conditional_match.group("cond").strip()
+        match = _DIRECTIVE_MATCH.match(line)
+
+        if match is None:
+            # skip over anything unparseable when in a disabled block (same as for valid directives below)
+            if self._conditional_block and not self._conditional_block.condition:
+                return
 
-            if stmt.upper() == "ENDIF":
+            raise PreprocessorError(f"unknown preprocessor directive found", ctx)
+
+        if match.group("stmt") is not None:
+            conditional_match = match
+            condition = match.group("cond").strip()
+
+            if match.group("stmt").upper() == "ENDIF":
                 if self._conditional_block is None:
                     raise PreprocessorError("found @ENDIF without a previous @IF", ctx)
 
@@ -151,37 +247,40 @@ class CP2KPreprocessor(Iterator):
                     raise
 
                 # prefix-whitespace are consumed in the regex, suffix with the strip() above
+                # partition() both detects the operator and splits in one pass, without a list
                 if not condition or condition == "0":
                     self._conditional_block = _ConditionalBlock(False, ctx)
-                elif "==" in condition:
-                    lhs, rhs = [s.strip() for s in condition.split("==", maxsplit=1)]
-                    self._conditional_block = _ConditionalBlock(lhs == rhs, ctx)
-                elif "/=" in condition:
-                    lhs, rhs = [s.strip() for s in condition.split("/=", maxsplit=1)]
-                    self._conditional_block = _ConditionalBlock(lhs != rhs, ctx)
                 else:
-                    self._conditional_block = _ConditionalBlock(True, ctx)
+                    lhs, sep, rhs = condition.partition("==")
+                    if sep:
+                        self._conditional_block = _ConditionalBlock(lhs.strip() == rhs.strip(), ctx)
+                    else:
+                        lhs, sep, rhs = condition.partition("/=")
+                        if sep:
+                            self._conditional_block = _ConditionalBlock(lhs.strip() != rhs.strip(), ctx)
+                        else:
+                            self._conditional_block = _ConditionalBlock(True, ctx)
 
             return
 
         if self._conditional_block and not self._conditional_block.condition:
             return
 
-        set_match = _SET_MATCH.match(line)
-        if set_match:
+        if match.group("var") is not None:
             # resolve other variables in the definition first
-            key = set_match.group("var")
-            value = self._resolve_variables(set_match.group("value"))
+            key = match.group("var")
+            value = self._resolve_variables(match.group("value"))
 
             if not _VALID_VAR_NAME_MATCH.match(key):
                 raise PreprocessorError(f"invalid variable name '{key}'", ctx) from None
 
-            self._varstack[key.upper()] = _Variable(value, ctx)
+            self._varstack[sys.intern(key.upper())] = _Variable(value, ctx)
+            self._varstack_version += 1  # invalidate previously cached resolutions
             return
 
-        include_match = _INCLUDE_MATCH.match(line)
-        if include_match:
-            inctype = include_match["type"]
+        else:  # the only remaining alternative: INCLUDE/XCTYPE
+            include_match = match
+            inctype = match["inctype"]
 
             # resolve variables first
             try:
@@ -220,8 +319,8 @@ class CP2KPreprocessor(Iterator):
 
             for inc_dir in self._inc_dirs:
                 try:
-                    # if the filename is an absolute path, joinpath uses that one and will ignore the dir
-                    fhandle = inc_dir.joinpath(filename).open("r")
+                    # if the filename is an absolute path, join uses that one and will ignore the dir
+                    fhandle = open(os.path.join(inc_dir, filename), "r", buffering=_INCLUDE_BUFFER_SIZE)
 
                     # the _lineiter takes over the handle and closes it at EOF
                     self._lineiter.add_file(fhandle)
@@ -232,26 +331,32 @@ class CP2KPreprocessor(Iterator):
             else:
                 raise PreprocessorError(f"specified INCLUDE/XCTYPE {filename} could not be opened", ctx)
 
-            return
-
-        raise PreprocessorError(f"unknown preprocessor directive found", ctx)
-
     def __next__(self):
+        # hoist per-line lookups out of the loop: bound methods to locals and the
+        # conditional block into a local re-read only after a directive may have changed it
+        dispatch = _LINE_DISPATCH_MATCH.match
+        parse_instruction = self._parse_preprocessor_instruction
+        resolve_variables = self._resolve_variables
+        conditional_block = self._conditional_block
+
         for line in self._lineiter:
             try:
-                # ignore empty lines and comments:
-                if not line or line.startswith(COMMENT_CHARS):
-                    continue
+                match = dispatch(line)
+
+                if match:
+                    # ignore comments:
+                    if match.lastgroup == "comment":
+                        continue
 
-                if line.startswith("@"):
-                    self._parse_preprocessor_instruction(line)
+                    parse_instruction(line)
+                    conditional_block = self._conditional_block
                     continue
 
-                # ignore everything in a disable @IF/@ENDIF block
-                if self._conditional_block and not self._conditional_block.condition:
+                # ignore empty lines and everything in a disabled @IF/@ENDIF block
+                if not line or (conditional_block and not conditional_block.condition):
                     continue
 
-                return self._resolve_variables(line)
+                return resolve_variables(line)
 
             except (PreprocessorError, TokenizerError) as exc:
                 exc.args[1]["filename"] = self._lineiter.fname
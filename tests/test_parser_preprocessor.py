@@ -93,6 +93,19 @@ def test_unknown_preprocessor():
     assert "unknown preprocessor directive found" in excinfo.value.args[0]
 
 
+def test_unknown_preprocessor_directive_prefix():
+    cp2k_parser = CP2KInputParser(DEFAULT_CP2K_INPUT_XML)
+
+    # a known directive name followed by more letters must not be parsed as that
+    # directive ('@IFFY' is not '@IF FY'), it is rejected as unknown instead
+    fhandle = io.StringIO("""@IFFY 1\n@ENDIF""")
+
+    with pytest.raises(PreprocessorError) as excinfo:
+        cp2k_parser.parse(fhandle)
+
+    assert "unknown preprocessor directive found" in excinfo.value.args[0]
+
+
 def test_include_missing():
     cp2k_parser = CP2KInputParser(DEFAULT_CP2K_INPUT_XML)
 
@@ -137,6 +150,17 @@ def test_include_undefined_var():
     assert "undefined variable" in excinfo.value.args[0]
 
 
+def test_var_composed_name():
+    cp2k_parser = CP2KInputParser(DEFAULT_CP2K_INPUT_XML)
+
+    # a ${...} within the span of a $... reference is resolved first and composes the key,
+    # here $A${B} becomes $Ayy which then resolves via the variable AYY
+    fhandle = io.StringIO("@SET B yy\n@SET AYY energy\n&GLOBAL\n   RUN_TYPE $A${B}\n&END GLOBAL")
+    tree = cp2k_parser.parse(fhandle)
+
+    assert tree["+global"]["run_type"] == "energy"
+
+
 def test_var_default_val():
     cp2k_parser = CP2KInputParser(DEFAULT_CP2K_INPUT_XML)
 
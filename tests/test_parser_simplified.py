@@ -1,7 +1,36 @@
+import io
+
 from . import TEST_DIR
 from cp2k_input_tools.parser import CP2KInputParserSimplified
 
 
+def test_simplified_repeated_keywords():
+    cp2k_parser = CP2KInputParserSimplified(key_trafo=str.upper)
+
+    fhandle = io.StringIO(
+        """
+        &FORCE_EVAL
+           &DFT
+              BASIS_SET_FILE_NAME BASIS_MOLOPT
+              BASIS_SET_FILE_NAME BASIS_MOLOPT_UCL
+           &END DFT
+           &SUBSYS
+              &KIND H
+                 BASIS_SET ORB DZVP-MOLOPT-GTH
+                 BASIS_SET AUX_FIT FIT3
+              &END KIND
+           &END SUBSYS
+        &END FORCE_EVAL
+        """
+    )
+    tree = cp2k_parser.parse(fhandle)
+
+    # all occurrences in file order: the first one must not be dropped or overwritten,
+    # and each occurrence of a multi-value keyword keeps its own list of values
+    assert tree["FORCE_EVAL"]["DFT"]["BASIS_SET_FILE_NAME"] == ["BASIS_MOLOPT", "BASIS_MOLOPT_UCL"]
+    assert tree["FORCE_EVAL"]["SUBSYS"]["KIND"]["H"]["BASIS_SET"] == [["ORB", "DZVP-MOLOPT-GTH"], ["AUX_FIT", "FIT3"]]
+
+
 def test_simplified_no_unpack():
     cp2k_parser = CP2KInputParserSimplified(key_trafo=str.upper, multi_value_unpack=False, repeated_section_unpack=False)
 